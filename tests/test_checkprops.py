@@ -53,6 +53,16 @@ def testCheckCLISuboptions():
 
     # pylint: disable=protected-access
     from virtinst import cli
+
+    # Parser classes register their suboptions on first use. Make sure
+    # every one of them is registered, so untouched parsers are reported
+    # too. This also runs each class' leftover aliases check
+    parserclasses = [cli.VirtCLIParser]
+    while parserclasses:
+        parserclass = parserclasses.pop()
+        parserclasses.extend(parserclass.__subclasses__())
+        parserclass._ensure_initialized()
+
     unchecked = cli._SuboptChecker.get_unseen()
     if unchecked:
         msg = "\n\n"
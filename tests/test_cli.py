@@ -21,6 +21,7 @@ except ImportError:
 from gi.repository import Libosinfo
 
 from virtinst import log
+from virtinst import BuildConfig
 from virtinst import OSDB
 from virtinst.install import unattended
 
@@ -934,6 +935,7 @@ c.add_compare("--disk %(EXISTIMG1)s --os-variant fedora28 --cloud-init ssh-key=%
 c.add_compare("--disk %(EXISTIMG1)s --os-variant fedora28 --cloud-init user-data=%(XMLDIR)s/cloudinit/user-data.txt,meta-data=%(XMLDIR)s/cloudinit/meta-data.txt", "cloud-init-options")  # --cloud-init user-data=,meta-data=
 c.add_valid("--panic help --disk=? --check=help", grep="path_in_use")  # Make sure introspection doesn't blow up
 c.add_valid("--connect test:///default --test-stub-command", use_default_args=False)  # --test-stub-command
+c.add_valid("--version", use_default_args=False, grep=BuildConfig.version)  # bare --version shortcut, skips building the parser
 c.add_valid("--nodisks --pxe", grep="VM performance may suffer")  # os variant warning
 c.add_invalid("--hvm --nodisks --pxe foobar")  # Positional arguments error
 c.add_invalid("--nodisks --pxe --name test")  # Colliding name
@@ -1293,6 +1295,7 @@ c.add_compare("--edit 3 --sound pcspk", "edit-pos-num")
 c.add_compare("--edit -1 --video qxl", "edit-neg-num")
 c.add_compare("--edit all --host-device driver.name=vfio", "edit-all")
 c.add_compare("--edit ich6 --sound pcspk", "edit-select-sound-model")
+c.add_invalid("--edit none --sound pcspk", grep="No matching objects found for --edit none")  # 'none' is a lookup value here, not --sound none
 c.add_compare("--edit target=hda --disk /dev/null", "edit-select-disk-target")
 c.add_compare("--edit /tmp/foobar2 --disk shareable=off,readonly=on", "edit-select-disk-path")
 c.add_compare("--edit mac=00:11:7f:33:44:55 --network target=nic55", "edit-select-network-mac")
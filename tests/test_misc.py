@@ -4,11 +4,14 @@
 # See the COPYING file in the top-level directory.
 
 import io
+import logging
 import os
+import tempfile
 import unittest
 
 import virtinst
 
+import tests
 from tests import utils
 
 
@@ -130,6 +133,67 @@ def test_misc_cpu_cornercases():
     assert guest.cpu.model is None
 
 
+def test_misc_cli_fail_stack():
+    """
+    cli.fail() only formats the call stack if it will be logged
+    """
+    from virtinst import cli
+    origlevel = virtinst.log.level
+    try:
+        for level, expect_stack in [(logging.WARNING, False),
+                                    (logging.DEBUG, True)]:
+            virtinst.log.setLevel(level)
+            with unittest.mock.patch("traceback.format_stack",
+                    return_value=[]) as mock_stack:
+                cli.fail("test fail message", do_exit=False)
+            assert mock_stack.called == expect_stack
+    finally:
+        virtinst.log.setLevel(origlevel)
+
+
+def test_misc_reset_logging():
+    """
+    reset_logging() drops every handler, even with several attached
+    """
+    from virtinst import reset_logging
+    rootlogger = logging.getLogger()
+    origroothandlers = rootlogger.handlers[:]
+    try:
+        for dummy in range(3):
+            rootlogger.addHandler(logging.NullHandler())
+            virtinst.log.addHandler(logging.NullHandler())
+        reset_logging()
+        assert not rootlogger.handlers
+        assert not virtinst.log.handlers
+    finally:
+        for handler in origroothandlers:
+            rootlogger.addHandler(handler)
+        tests.setup_logging()
+
+
+def test_misc_logfile_queue():
+    """
+    The cli logfile handler writes every queued record out when
+    reset_logging() closes it, and closes the logfile
+    """
+    # pylint: disable=protected-access
+    from virtinst import cli
+    origlevel = virtinst.log.level
+    logfile = tempfile.NamedTemporaryFile()
+    try:
+        target = logging.FileHandler(logfile.name)
+        virtinst.log.setLevel(logging.DEBUG)
+        virtinst.log.addHandler(cli._LogfileQueueHandler(target))
+        for idx in range(100):
+            virtinst.log.debug("queued record %s", idx)
+        virtinst.reset_logging()
+        assert target.stream is None
+        assert "queued record 99" in open(logfile.name).read()
+    finally:
+        virtinst.log.setLevel(origlevel)
+        tests.setup_logging()
+
+
 def test_misc_meter():
     """
     Test coverage of our urlgrabber meter copy
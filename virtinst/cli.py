@@ -8,7 +8,11 @@
 
 import argparse
 import collections
+import functools
+import logging
+import logging.handlers
 import os
+import queue
 import re
 import shlex
 import shutil
@@ -32,9 +36,6 @@ from .install.unattended import UnattendedData
 from .install.cloudinit import CloudInitData
 
 
-HAS_VIRTVIEWER = shutil.which("virt-viewer")
-
-
 ##########################
 # Global option handling #
 ##########################
@@ -42,9 +43,13 @@ HAS_VIRTVIEWER = shutil.which("virt-viewer")
 class _GlobalState(object):
     def __init__(self):
         self.quiet = False
+        # Snapshot of the environment check, so helpers called after
+        # setupLogging don't need to repeatedly consult os.environ
+        self.in_testsuite = xmlutil.in_testsuite()
 
         self.all_checks = None
         self._validation_checks = {}
+        self._has_virtviewer = None
 
     def set_validation_check(self, checkname, val):
         self._validation_checks[checkname] = val
@@ -56,6 +61,12 @@ class _GlobalState(object):
         # Default to True for all checks
         return self._validation_checks.get(checkname, True)
 
+    def has_virtviewer(self):  # pragma: no cover
+        # Only search $PATH when a console is actually wanted
+        if self._has_virtviewer is None:
+            self._has_virtviewer = bool(shutil.which("virt-viewer"))
+        return self._has_virtviewer
+
 
 _globalstate = None
 
@@ -104,6 +115,13 @@ class VirtHelpFormatter(argparse.RawDescriptionHelpFormatter):
 
 
 def setupParser(usage, description, introspection_epilog=False):
+    if sys.argv[1:] == ["--version"]:
+        # Shortcut the common case, so we don't build the full option
+        # tree just to print the version. argparse handles any other
+        # usage of --version
+        print(BuildConfig.version)
+        sys.exit(0)
+
     epilog = _("See man page for examples and full option syntax.")
     if introspection_epilog:
         epilog = _("Use '--option=?' or '--option help' to see "
@@ -119,19 +137,57 @@ def setupParser(usage, description, introspection_epilog=False):
     return parser
 
 
+class _LazyJoin(object):
+    """
+    Wrapper for passing a joined list as a logging argument. The join
+    only happens if a handler actually formats the record
+    """
+    __slots__ = ("_sep", "_items")
+
+    def __init__(self, sep, items):
+        self._sep = sep
+        self._items = items
+
+    def __str__(self):
+        return self._sep.join(self._items)
+
+
+class _LogfileQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to a background thread, which writes them to the
+    logfile as they come in. That keeps the logfile IO off the main
+    thread without holding any records back. Closing the handler,
+    which logging.shutdown() does at exit, writes out anything still
+    queued and closes the logfile
+    """
+    def __init__(self, target):
+        logqueue = queue.Queue(-1)
+        super().__init__(logqueue)
+        self._target = target
+        self._listener = logging.handlers.QueueListener(logqueue, target)
+        self._listener.start()
+
+    def close(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+            self._target.close()
+        super().close()
+
+
 def earlyLogging():
     reset_logging()
-    import logging
     logging.basicConfig(level=logging.DEBUG, format='%(message)s')
 
 
 def setupLogging(appname, debug_stdout, do_quiet, cli_app=True):
     _reset_global_state()
-    get_global_state().quiet = do_quiet
+    globalstate = get_global_state()
+    globalstate.quiet = do_quiet
 
     vi_dir = VirtinstConnection.get_app_cache_dir()
     logfile = os.path.join(vi_dir, appname + ".log")
-    if xmlutil.in_testsuite():
+    if globalstate.in_testsuite:
         vi_dir = None
         logfile = None
 
@@ -146,9 +202,11 @@ def setupLogging(appname, debug_stdout, do_quiet, cli_app=True):
                 raise RuntimeError("Could not create directory %s: %s" %
                                    (vi_dir, e)) from None
 
+        # Check access first: it's a single syscall for the common
+        # case of an existing, writable logfile
         if (logfile and
-            os.path.exists(logfile) and
-            not os.access(logfile, os.W_OK)):
+            not os.access(logfile, os.W_OK) and
+            os.path.exists(logfile)):
             raise RuntimeError("No write access to logfile %s" % logfile)
     except Exception as e:  # pragma: no cover
         log.warning("Error setting up logfile: %s", e)
@@ -159,8 +217,6 @@ def setupLogging(appname, debug_stdout, do_quiet, cli_app=True):
                   "%(levelname)s (%(module)s:%(lineno)d) %(message)s")
     streamErrorFormat = "%(levelname)-8s %(message)s"
 
-    import logging
-    import logging.handlers
     reset_logging()
 
     log.setLevel(logging.DEBUG)
@@ -169,6 +225,10 @@ def setupLogging(appname, debug_stdout, do_quiet, cli_app=True):
             logfile, "ae", 1024 * 1024, 5)
         fileHandler.setFormatter(
             logging.Formatter(fileFormat, dateFormat))
+        if cli_app:
+            # Write the logfile from a background thread. The long
+            # running UI keeps writing records itself
+            fileHandler = _LogfileQueueHandler(fileHandler)
         log.addHandler(fileHandler)
 
     streamHandler = logging.StreamHandler(sys.stderr)
@@ -178,7 +238,7 @@ def setupLogging(appname, debug_stdout, do_quiet, cli_app=True):
                                                      dateFormat))
     elif cli_app or not logfile:
         # Have cli tools show WARN/ERROR by default
-        if get_global_state().quiet:
+        if globalstate.quiet:
             level = logging.ERROR
         else:
             level = logging.WARN
@@ -192,8 +252,8 @@ def setupLogging(appname, debug_stdout, do_quiet, cli_app=True):
 
     # Log uncaught exceptions
     def exception_log(typ, val, tb):  # pragma: no cover
-        log.debug("Uncaught exception:\n%s",
-                      "".join(traceback.format_exception(typ, val, tb)))
+        # Let logging format the traceback, only if a handler wants it
+        log.debug("Uncaught exception:", exc_info=(typ, val, tb))
         if not debug_stdout:
             # If we are already logging to stdout, don't double print
             # the backtrace
@@ -201,7 +261,7 @@ def setupLogging(appname, debug_stdout, do_quiet, cli_app=True):
     sys.excepthook = exception_log
 
     # Log the app command string
-    log.debug("Launched with command line: %s", " ".join(sys.argv))
+    log.debug("Launched with command line: %s", _LazyJoin(" ", sys.argv))
 
 
 ##############################
@@ -252,9 +312,12 @@ def fail(msg, do_exit=True):
     """
     Convenience function when failing in cli app
     """
-    log.debug("".join(traceback.format_stack()))
+    # Formatting the stack is expensive, only do it if it will be logged
+    debug = log.isEnabledFor(logging.DEBUG)
+    if debug:
+        log.debug("".join(traceback.format_stack()))
     log.error(msg)
-    if sys.exc_info()[0] is not None:
+    if debug and sys.exc_info()[0] is not None:
         log.debug("", exc_info=True)
     if do_exit:
         _fail_exit()
@@ -309,7 +372,7 @@ def check_path_search(conn, path):
     log.warning(msg)  # pragma: no cover
 
 
-def _optional_fail(msg, checkname, warn_on_skip=True):
+def _optional_fail(msg, checkname):
     """
     Handle printing a message with an associated --check option
     """
@@ -320,8 +383,7 @@ def _optional_fail(msg, checkname, warn_on_skip=True):
 
     log.debug("Skipping --check %s error condition '%s'",
         checkname, msg)
-    if warn_on_skip:
-        log.warning(msg)
+    log.warning(msg)
 
 
 def validate_mac(conn, macaddr):
@@ -368,10 +430,15 @@ def validate_disk(dev, warn_overwrite=False):
         """
         Check if specified size exceeds available storage
         """
+        # A skipped disk_size check doesn't warn, so when it's disabled
+        # don't bother querying the storage pool
+        if not get_global_state().get_validation_check("disk_size"):
+            log.debug("Skipping --check disk_size for path '%s'", path)
+            return
         isfatal, errmsg = dev.is_size_conflict()
         # The isfatal case should have already caused us to fail
         if not isfatal and errmsg:
-            _optional_fail(errmsg, "disk_size", warn_on_skip=False)
+            _optional_fail(errmsg, "disk_size")
 
     check_path_exists()
     check_inuse_conflict()
@@ -380,24 +447,33 @@ def validate_disk(dev, warn_overwrite=False):
 
 
 def _run_console(message, args):
-    log.debug("Running: %s", " ".join(args))
+    log.debug("Running: %s", _LazyJoin(" ", args))
     argstr = " ".join([shlex.quote(a) for a in args])
     print_stdout(message % {"command": argstr})
 
-    if xmlutil.in_testsuite():
+    if get_global_state().in_testsuite:
         args = ["/bin/test"]
 
-    child = os.fork()
-    if child:
-        return child
+    if not hasattr(os, "posix_spawnp"):  # pragma: no cover
+        child = os.fork()
+        if child:
+            return child
 
-    # pylint: disable=protected-access
-    try:  # pragma: no cover
-        os.execvp(args[0], args)
+        # pylint: disable=protected-access
+        try:
+            os.execvp(args[0], args)
+        except Exception as e:
+            print("Error launching %s: %s" % (args, e))
+        finally:
+            os._exit(1)
+
+    # posix_spawn avoids copying our whole address space into a
+    # forked child just to exec the console command
+    try:
+        return os.posix_spawnp(args[0], args, os.environ)
     except Exception as e:  # pragma: no cover
         print("Error launching %s: %s" % (args, e))
-    finally:
-        os._exit(1)  # pragma: no cover
+        return None
 
 
 def _gfx_console(guest):
@@ -425,7 +501,8 @@ def _txt_console(guest):
 
 def get_meter():
     import virtinst.progress
-    quiet = (get_global_state().quiet or xmlutil.in_testsuite())
+    globalstate = get_global_state()
+    quiet = (globalstate.quiet or globalstate.in_testsuite)
     return virtinst.progress.make_meter(quiet=quiet)
 
 
@@ -490,27 +567,39 @@ def fail_conflicting(option1, option2):
 # bash completion helpers #
 ###########################
 
+@functools.lru_cache(maxsize=1)
 def _get_completer_parsers():
-    return VIRT_PARSERS + [ParserCheck, ParserLocation,
+    # Cached, VirtCLIParser.register() clears this when VIRT_PARSERS changes
+    return tuple(VIRT_PARSERS + [ParserCheck, ParserLocation,
             ParserUnattended, ParserInstall, ParserCloudInit, ParserXML,
-            ParserOSVariant]
+            ParserOSVariant])
+
+
+@functools.lru_cache(maxsize=None)
+def _completer_suboptions(parserclass):
+    """
+    Return the sorted tuple of 'suboption=' strings for the parser class.
+    The list is static, so only build it once per class.
+    """
+    # pylint: disable=protected-access
+    parserclass._ensure_initialized()
+    names = sorted(virtarg.nonregex_cliname() for
+                   virtarg in parserclass._virtargs)
+    return tuple(name + "=" for name in names)
 
 
 def _virtparser_completer(prefix, **kwargs):
     sub_options = []
     for parserclass in _get_completer_parsers():
         if kwargs['action'].dest == parserclass.cli_arg_name:
-            # pylint: disable=protected-access
-            for virtarg in sorted(parserclass._virtargs,
-                                  key=lambda p: p.nonregex_cliname()):
-                sub_options.append(virtarg.nonregex_cliname() + "=")
+            sub_options.extend(_completer_suboptions(parserclass))
 
-    entered_options = prefix.split(",")
-    for option in entered_options:
+    entered_options = set()
+    for option in prefix.split(","):
         pos = option.find("=")
-        if pos > 0 and option[: pos + 1] in sub_options:
-            sub_options.remove(option[: pos + 1])
-    return sub_options
+        if pos > 0:
+            entered_options.add(option[: pos + 1])
+    return [o for o in sub_options if o not in entered_options]
 
 
 def _completer_validator(suboption, current_input):
@@ -540,14 +629,12 @@ def autocomplete(parser):
     import argcomplete
     import unittest.mock
 
-    parsernames = [pclass.cli_flag_name() for pclass in
-                   _get_completer_parsers()]
+    parsernames = {pclass.cli_flag_name() for pclass in
+                   _get_completer_parsers()}
     # pylint: disable=protected-access
     for action in parser._actions:
-        for opt in action.option_strings:
-            if opt in parsernames:
-                action.completer = _virtparser_completer
-                break
+        if not parsernames.isdisjoint(action.option_strings):
+            action.completer = _virtparser_completer
 
     kwargs = {"validator": _completer_validator}
     if xmlutil.in_testsuite():
@@ -947,25 +1034,25 @@ def add_xml_option(grp):
 # (for options like --disk, --network, etc. #
 #############################################
 
-def _raw_on_off_convert(s):
-    tvalues = ["y", "yes", "1", "true", "t", "on"]
-    fvalues = ["n", "no", "0", "false", "f", "off"]
+_ONOFF_MAP = {
+    "y": True, "yes": True, "1": True, "true": True, "t": True, "on": True,
+    "n": False, "no": False, "0": False, "false": False, "f": False,
+    "off": False,
+}
 
-    s = (s or "").lower()
-    if s in tvalues:
-        return True
-    elif s in fvalues:
-        return False
-    return None
+
+# Map on/off style --network link_state values to libvirt's up/down
+_LINK_STATE_MAP = dict((key, "up" if onoff else "down")
+                       for key, onoff in _ONOFF_MAP.items())
 
 
 def _on_off_convert(key, val):
     if val is None:
         return None
 
-    val = _raw_on_off_convert(val)
-    if val is not None:
-        return val
+    ret = _ONOFF_MAP.get(val.lower())
+    if ret is not None:
+        return ret
     raise fail(_("%(key)s must be 'yes' or 'no'") % {"key": key})
 
 
@@ -1017,12 +1104,26 @@ class _VirtCLIArgumentStatic(object):
         DeviceDisk has multiple seclabel children, this provides a hook
         to lookup the specified child object.
     """
+    # There's one of these per registered suboption, skip the __dict__
+    __slots__ = ("cliname", "propname", "_propname_parts",
+                 "_checked_prop_types", "cb", "can_comma", "ignore_default",
+                 "is_onoff", "lookup_cb", "find_inst_cb", "_parent_cliname",
+                 "_aliases", "_literal_names", "_name_matchers")
+
     def __init__(self, cliname, propname, parent_cliname,
                  cb=None, can_comma=None,
                  ignore_default=False, is_onoff=False,
                  lookup_cb=-1, find_inst_cb=None):
-        self.cliname = cliname
+        # Interned so suboption dict lookups against the interned user
+        # keys from parse_optstr_tuples can match on identity
+        self.cliname = sys.intern(cliname)
         self.propname = propname
+        # Pieces from split() aren't interned, and CPython's type attribute
+        # cache only kicks in for interned names, so intern them for the
+        # getattr/setattr calls in get_prop and set_prop
+        parts = propname.split(".") if propname else []
+        self._propname_parts = tuple(sys.intern(part) for part in parts)
+        self._checked_prop_types = set()
         self.cb = cb
         self.can_comma = can_comma
         self.ignore_default = ignore_default
@@ -1031,6 +1132,7 @@ class _VirtCLIArgumentStatic(object):
         self.find_inst_cb = find_inst_cb
         self._parent_cliname = parent_cliname
         self._aliases = []
+        self._build_name_matchers()
 
         if not self.propname and not self.cb:
             raise xmlutil.DevError("propname or cb must be specified.")
@@ -1057,22 +1159,78 @@ class _VirtCLIArgumentStatic(object):
         return "--%s %s" % (self._parent_cliname, cliname)
 
     def set_aliases(self, aliases):
-        self._aliases = aliases
+        self._aliases = [sys.intern(alias) for alias in aliases]
         for alias in self._aliases:
             _SuboptChecker.add_all(self._testsuite_argcheck_name(alias))
+        self._build_name_matchers()
+
+    def _build_name_matchers(self):
+        """
+        Precompute what match_name needs: a set of the plain names, and
+        the ordered list of (name, compiled regex or None) for when any
+        name is a regex like 'seclabel[0-9]*.model'
+        """
+        names = [self.cliname] + xmlutil.listify(self._aliases)
+        self._literal_names = frozenset(names)
+        self._name_matchers = []
+        if any("[" in name for name in names):
+            for name in names:
+                regex = None
+                if "[" in name:
+                    regex = _cliname_regex(name)
+                self._name_matchers.append((name, regex))
 
     def nonregex_cliname(self):
         return self.cliname.replace("[0-9]*", "")
 
+    def get_prop(self, inst):
+        """
+        Equivalent of xmlutil.get_prop_path(inst, self.propname), using
+        the propname pieces we split up front
+        """
+        for piece in self._propname_parts:
+            inst = getattr(inst, piece)
+        return inst
+
+    def check_prop(self, inst):
+        """
+        Raise a DevError if inst doesn't have our propname. This is
+        purely a sanity check of the parser definitions, so only probe
+        the first time we see each inst class.
+        """
+        insttype = type(inst)
+        if insttype in self._checked_prop_types:
+            return
+        try:
+            self.get_prop(inst)
+        except AttributeError:  # pragma: no cover
+            msg = "obj=%s does not have member=%s" % (inst, self.propname)
+            raise xmlutil.DevError(msg) from None
+        self._checked_prop_types.add(insttype)
+
+    def set_prop(self, inst, val):
+        """
+        Equivalent of xmlutil.set_prop_path(inst, self.propname, val)
+        """
+        for piece in self._propname_parts[:-1]:
+            inst = getattr(inst, piece)
+        setattr(inst, self._propname_parts[-1], val)
+
     def match_name(self, userstr):
         """
         Return True if the passed user string matches this
         VirtCLIArgument. So for an option like --foo bar=X, this
         checks if we are the parser for 'bar'
         """
-        for cliname in [self.cliname] + xmlutil.listify(self._aliases):
-            if "[" in cliname:
-                ret = re.match("^%s$" % cliname.replace(".", r"\."), userstr)
+        if not self._name_matchers:
+            if userstr not in self._literal_names:
+                return False
+            _SuboptChecker.add_seen(self._testsuite_argcheck_name(userstr))
+            return True
+
+        for cliname, regex in self._name_matchers:
+            if regex:
+                ret = regex.match(userstr)
             else:
                 ret = (cliname == userstr)
             if ret:
@@ -1101,16 +1259,21 @@ class _VirtCLIArgument(object):
             raise RuntimeError("Option '%s' had no value set." % key)
         if val == "":
             val = None
-        if virtarg.is_onoff:
+        elif virtarg.is_onoff:
             val = _on_off_convert(key, val)
 
         self.val = val
         self.key = key
         self._virtarg = virtarg
 
-        # For convenience
-        self.propname = virtarg.propname
-        self.cliname = virtarg.cliname
+    # For convenience of the parser callbacks
+    @property
+    def propname(self):
+        return self._virtarg.propname
+
+    @property
+    def cliname(self):
+        return self._virtarg.cliname
 
     def parse_param(self, parser, inst):
         """
@@ -1128,17 +1291,13 @@ class _VirtCLIArgument(object):
                                               inst, self.val, self,
                                               can_edit=True)
 
-        try:
-            if self.propname:
-                xmlutil.get_prop_path(inst, self.propname)
-        except AttributeError:  # pragma: no cover
-            msg = "obj=%s does not have member=%s" % (inst, self.propname)
-            raise xmlutil.DevError(msg) from None
+        if self._virtarg.propname:
+            self._virtarg.check_prop(inst)
 
         if self._virtarg.cb:
             self._virtarg.cb(parser, inst, self.val, self)
         else:
-            xmlutil.set_prop_path(inst, self.propname, self.val)
+            self._virtarg.set_prop(inst, self.val)
 
     def lookup_param(self, parser, inst):
         """
@@ -1149,7 +1308,7 @@ class _VirtCLIArgument(object):
         instantiated with key=device val=floppy, so return
         'inst.device == floppy'
         """
-        if not self.propname and not self._virtarg.lookup_cb:
+        if not self._virtarg.propname and not self._virtarg.lookup_cb:
             raise RuntimeError(
                 _("Don't know how to match device type '%(device_type)s' "
                   "property '%(property_name)s'") %
@@ -1167,7 +1326,27 @@ class _VirtCLIArgument(object):
             return self._virtarg.lookup_cb(parser,
                                            inst, self.val, self)
         else:
-            return xmlutil.get_prop_path(inst, self.propname) == self.val
+            return self._virtarg.get_prop(inst) == self.val
+
+
+def _scan_subopts(optstr):
+    """
+    Yield (cliname, val) tuples for an option string that doesn't contain
+    any quoting or escape characters. val is None if there's no '='
+    """
+    for opt in optstr.split(","):
+        if not opt:
+            continue
+        cliname, sep, val = opt.partition("=")
+        yield sys.intern(cliname), (val if sep else None)
+
+
+def _needs_shlex(value):
+    """
+    Return True if value has quoting or escapes that only shlex
+    handles. Otherwise plain str splitting gives the same result
+    """
+    return "'" in value or '"' in value or "\\" in value
 
 
 def parse_optstr_tuples(optstr):
@@ -1177,76 +1356,121 @@ def parse_optstr_tuples(optstr):
 
     [("path", "foo"), ("size", "5"), ("path", "bar")]
     """
-    argsplitter = shlex.shlex(optstr or "", posix=True)
+    optstr = optstr or ""
+    if not _needs_shlex(optstr):
+        # The common case, no need to spin up a shlex parser
+        return list(_scan_subopts(optstr))
+
+    argsplitter = shlex.shlex(optstr, posix=True)
     argsplitter.commenters = ""
     argsplitter.whitespace = ","
     argsplitter.whitespace_split = True
     ret = []
 
-    for opt in list(argsplitter):
+    for opt in argsplitter:
         if "=" in opt:
             cliname, val = opt.split("=", 1)
         else:
             cliname = opt
             val = None
 
-        ret.append((cliname, val))
+        ret.append((sys.intern(cliname), val))
     return ret
 
 
-def _parse_optstr_to_dict(optstr, virtargs, remove_first):
+def _parse_optstr_to_dict(opttuples, lookup_virtarg, remove_first):
     """
-    Parse the passed argument string into an OrderedDict WRT
-    the passed list of VirtCLIArguments and their special handling.
-
-    So for --disk path=foo,size=5, optstr is 'path=foo,size=5', and
-    we return {"path": "foo", "size": "5"}
+    Parse the passed argument tuples into an OrderedDict WRT
+    the parser's VirtCLIArguments and their special handling.
+    lookup_virtarg is the parser class' _lookup_virtarg. opttuples
+    is the output of parse_optstr_tuples. Neither opttuples nor the
+    remove_first list are modified.
+
+    So for --disk path=foo,size=5, opttuples is
+    [("path", "foo"), ("size", "5")] and we return
+    {"path": "foo", "size": "5"}
     """
     optdict = collections.OrderedDict()
-    opttuples = parse_optstr_tuples(optstr)
+
+    # Leading options without a value map to the remove_first names
+    nsplice = 0
+    for cliname, val in opttuples[:len(remove_first)]:
+        if val is not None:
+            break
+        nsplice += 1
+
+    def _get_tuple(idx):
+        cliname, val = opttuples[idx]
+        if idx < nsplice:
+            return remove_first[idx], cliname
+        return cliname, val
 
     def _lookup_virtarg(cliname):
-        for virtarg in virtargs:
-            if virtarg.match_name(cliname):
-                return virtarg
+        return lookup_virtarg(cliname)[1]
 
-    def _consume_comma_arg(commaopt):
-        while opttuples:
-            cliname, val = opttuples[0]
+    def _consume_comma_arg(idx, val):
+        parts = [val]
+        while idx < len(opttuples):
+            cliname, nextval = _get_tuple(idx)
             if _lookup_virtarg(cliname):
                 # Next tuple is for an actual virtarg
                 break
 
             # Next tuple is a continuation of the comma argument,
             # sum it up
-            opttuples.pop(0)
-            commaopt[1] += "," + cliname
-            if val:
-                commaopt[1] += "=" + val
+            idx += 1
+            if nextval:
+                cliname += "=" + nextval
+            parts.append(cliname)
+
+        if len(parts) > 1:
+            val = ",".join(parts)
+        return idx, val
+
+    idx = 0
+    while idx < len(opttuples):
+        cliname, val = _get_tuple(idx)
+        idx += 1
+        virtarg = _lookup_virtarg(cliname)
+        if virtarg and virtarg.can_comma:
+            idx, val = _consume_comma_arg(idx, val)
 
-        return commaopt
+        optdict[cliname] = val
 
-    # Splice in remove_first names upfront
-    for idx, (cliname, val) in enumerate(opttuples):
-        if val is not None or not remove_first:
-            break
-        opttuples[idx] = (remove_first.pop(0), cliname)
+    return optdict
 
-    while opttuples:
-        cliname, val = opttuples.pop(0)
-        virtarg = _lookup_virtarg(cliname)
-        if not virtarg:
-            optdict[cliname] = val
-            continue
 
-        if virtarg.can_comma:
-            commaopt = _consume_comma_arg([cliname, val])
-            cliname = commaopt[0]
-            val = commaopt[1]
+def _regex_name_head(cliname):
+    """
+    For a regex cliname like 'seclabel[0-9]*.model' return the part of
+    the first segment that every matching user key starts with, and
+    that is left after stripping the key's index digits: 'seclabel'.
+    """
+    head = cliname.split(".", 1)[0]
+    if head.endswith("[0-9]*"):
+        head = head[:-len("[0-9]*")]
+    if not head or "[" in head or head[-1].isdigit():
+        raise xmlutil.DevError(
+                "regex cliname=%s doesn't have a lookup head" % cliname)
+    return head
+
 
-        optdict[cliname] = val
+@functools.lru_cache(maxsize=None)
+def _cliname_regex(cliname):
+    """
+    Compiled full match regex for a cliname like 'seclabel[0-9]*.model'.
+    Many parsers register the same names, so share the compiled objects
+    """
+    return re.compile("^%s$" % cliname.replace(".", r"\."))
 
-    return optdict
+
+@functools.lru_cache(maxsize=None)
+def _find_inst_index_regex(cliarg):
+    """
+    Compiled regex for pulling the list index out of an option name,
+    like the 3 from 'seclabel3.model' when cliarg='seclabel'
+    """
+    return re.compile(r"%s(\d+)" % re.escape(cliarg))
 
 
 class _InitClass(type):
@@ -1266,12 +1490,26 @@ class _InitClass(type):
             raise RuntimeError(  # pragma: no cover
                     "_init_class must be a @classmethod")
         self = super().__new__(cls, name, bases, ns)
-        self._init_class(**kwargs)  # pylint: disable=protected-access
-
-        # Check for leftover aliases
-        if self.aliases:
-            raise xmlutil.DevError(
-                    "class=%s leftover aliases=%s" % (self, self.aliases))
+        if self.cli_arg_name:
+            # Cached for cli_flag_name()
+            # pylint: disable=protected-access
+            self._cli_flag_name = "--" + self.cli_arg_name.replace("_", "-")
+        if "remove_first" in ns:
+            # Classes may give a single name or a list, store a tuple
+            self.remove_first = tuple(xmlutil.listify(ns["remove_first"]))
+
+        # Subclasses that don't define their own _init_class, like
+        # ParserSerial, share the parent's args. The VirtCLIParser
+        # base class has nothing to register
+        is_base = not any(isinstance(base, _InitClass) for base in bases)
+        if init is None or is_base:
+            return self
+
+        # Registering all the suboptions is deferred until the class
+        # is actually used, see VirtCLIParser._ensure_initialized
+        # pylint: disable=protected-access
+        self._initialized = False
+        self._init_kwargs = kwargs
         return self
 
 
@@ -1300,14 +1538,29 @@ class VirtCLIParser(metaclass=_InitClass):
         certain VMs, and --rng none is extended to handle that. --rng none
         can be added to users command lines and it will give the expected
         results regardless of the virt-install version.
+    @handles_none: The parser's _parse() handles an option string of just
+        'none' itself without looking at any suboptions, like --disk none.
+        If any one of stub_none, handles_none or skip_default_propname
+        is set, an option string of just 'none' isn't split at all.
+        Parsers with a skip_default_propname don't need to set this.
+    @skip_default_propname: Guest property to set to True for an option
+        string of just 'none', like guest.skip_default_sound for
+        --sound none. See _maybe_skip_default
     @cli_arg_name: The command line argument this maps to, so
         "hostdev" for --hostdev
     """
     guest_propname = None
     remove_first = None
     stub_none = True
+    handles_none = False
+    skip_default_propname = None
     cli_arg_name = None
+    _cli_flag_name = None
+    _initialized = True
+    _init_kwargs = {}
     _virtargs = []
+    _virtarg_index = {}
+    _virtarg_regexes = {}
     aliases = {}
     supports_clearxml = True
 
@@ -1320,15 +1573,6 @@ class VirtCLIParser(metaclass=_InitClass):
             if means the argument is shared among multiple cli commands.
             Don't insist that each instance has full testsuite coverage.
         """
-        if not cls._virtargs:
-            cls._virtargs = []
-            if cls.supports_clearxml:
-                clearxmlvirtarg = _VirtCLIArgumentStatic(
-                    "clearxml", None, None,
-                    cb=cls._clearxml_cb, lookup_cb=None,
-                    is_onoff=True)
-                cls._virtargs.append(clearxmlvirtarg)
-
         parent_cliname = cls.cli_arg_name
         if kwargs.pop("skip_testsuite_tracking", False):
             parent_cliname = None
@@ -1339,9 +1583,81 @@ class VirtCLIParser(metaclass=_InitClass):
             virtarg.set_aliases(xmlutil.listify(cls.aliases.pop(virtarg.cliname)))
         cls._virtargs.append(virtarg)
 
+    @classmethod
+    def _ensure_initialized(cls):
+        """
+        Run the class' _init_class to register all its suboptions, if
+        that hasn't happened yet. Subclasses without their own
+        _init_class, like ParserSerial, initialize the parent they
+        share their suboptions with.
+        """
+        # pylint: disable=protected-access
+        for owner in cls.__mro__:  # pragma: no branch
+            if "_initialized" in owner.__dict__:
+                break
+        if owner._initialized:
+            return
+
+        owner._virtargs = []
+        if owner.supports_clearxml:
+            owner._virtargs.append(_VirtCLIArgumentStatic(
+                "clearxml", None, None,
+                cb=owner._clearxml_cb, lookup_cb=None,
+                is_onoff=True))
+        owner._init_class(**owner._init_kwargs)
+        owner._virtargs = tuple(owner._virtargs)
+        owner._build_virtarg_index()
+        owner._initialized = True
+
+        # Check for leftover aliases
+        if owner.aliases:
+            raise xmlutil.DevError(
+                    "class=%s leftover aliases=%s" % (owner, owner.aliases))
+
+    @classmethod
+    def _build_virtarg_index(cls):
+        """
+        Build the tables used by _lookup_virtarg: a dict mapping every
+        plain cliname/alias to (rank, virtarg), where rank is the
+        registration order, and a dict grouping the (rank, virtarg)
+        that have a regex name by their _regex_name_head
+        """
+        cls._virtarg_index = {}
+        regexes = {}
+        for rank, virtarg in enumerate(cls._virtargs):
+            # pylint: disable=protected-access
+            heads = set()
+            for name in virtarg._literal_names:
+                if "[" not in name:
+                    cls._virtarg_index.setdefault(name, (rank, virtarg))
+                else:
+                    heads.add(_regex_name_head(name))
+            for head in heads:
+                regexes.setdefault(head, []).append((rank, virtarg))
+        cls._virtarg_regexes = regexes
+
+    @classmethod
+    def _lookup_virtarg(cls, cliname):
+        """
+        Return (rank, virtarg) for the first registered virtarg that
+        matches the passed cliname, or (None, None)
+        """
+        hit = cls._virtarg_index.get(cliname)
+        head = cliname.split(".", 1)[0].rstrip("0123456789")
+        for rank, virtarg in cls._virtarg_regexes.get(head, []):
+            if hit and rank > hit[0]:
+                break
+            if virtarg.match_name(cliname):
+                return rank, virtarg
+        if hit:
+            # Let match_name handle the testsuite coverage tracking
+            hit[1].match_name(cliname)
+            return hit
+        return None, None
+
     @classmethod
     def cli_flag_name(cls):
-        return "--" + cls.cli_arg_name.replace("_", "-")
+        return cls._cli_flag_name
 
     @classmethod
     def print_introspection(cls):
@@ -1356,6 +1672,7 @@ class VirtCLIParser(metaclass=_InitClass):
                 prefix = "1"
             return prefix + virtarg.cliname
 
+        cls._ensure_initialized()
         print("%s options:" % cls.cli_flag_name())
         for arg in sorted(cls._virtargs, key=_sortkey):
             print("  %s" % arg.cliname)
@@ -1378,20 +1695,36 @@ class VirtCLIParser(metaclass=_InitClass):
 
     @classmethod
     def register(cls):
-        # register the parser class only once
-        if cls not in VIRT_PARSERS:
-            VIRT_PARSERS.append(cls)
+        # register the parser class only once. Check the class __dict__
+        # so subclasses don't see their parent's flag
+        if cls.__dict__.get("_registered"):
+            return
+        cls._registered = True
+        VIRT_PARSERS.append(cls)
+        _get_completer_parsers.cache_clear()
 
     @classmethod
     def _init_class(cls, **kwargs):
         """This method also terminates the super() chain"""
 
     def __init__(self, optstr, guest=None, editing=None):
+        self._ensure_initialized()
         self.optstr = optstr
         self.guest = guest
         self.editing = editing
-        self.optdict = _parse_optstr_to_dict(self.optstr,
-                self._virtargs, xmlutil.listify(self.remove_first)[:])
+        self._opttuples = []
+        self.optdict = collections.OrderedDict()
+        none_is_noop = (self.stub_none or self.handles_none or
+                        bool(self.skip_default_propname))
+        if self.optstr != "none" or not none_is_noop:
+            self._split_optstr()
+
+    def _split_optstr(self):
+        # Keep the raw tuples around for parsers that need to see
+        # repeated options, which the optdict collapses
+        self._opttuples = parse_optstr_tuples(self.optstr)
+        self.optdict = _parse_optstr_to_dict(self._opttuples,
+                self._lookup_virtarg, self.remove_first)
 
     def _clearxml_cb(self, inst, val, virtarg):
         """
@@ -1424,18 +1757,28 @@ class VirtCLIParser(metaclass=_InitClass):
             this parameter maps too. For the seclabel example, we want
             disk.seclabels, so this value is 'seclabels'
         """
+        index_regex = _find_inst_index_regex(cliarg)
+
         def cb(inst, val, virtarg, can_edit):
             ignore = val
             num = 0
-            reg = re.search(r"%s(\d+)" % cliarg, virtarg.key)
-            if reg:
-                num = int(reg.groups()[0])
-
+            key = virtarg.key
+            # Non-indexed names like 'cell.memory' or plain 'initarg'
+            # are by far the common case, only run the regex if there
+            # is an index for it to find
+            if key != cliarg and any(c.isdigit() for c in key):
+                reg = index_regex.search(key)
+                if reg:
+                    num = int(reg.groups()[0])
+
+            # The property getter hands back a fresh copy on every
+            # access, so fetch it once and track the new children locally
+            childlist = xmlutil.get_prop_path(inst, list_propname)
             if can_edit:
-                while len(xmlutil.get_prop_path(inst, list_propname)) < (num + 1):
-                    xmlutil.get_prop_path(inst, list_propname).add_new()
+                while len(childlist) < (num + 1):
+                    childlist.append(childlist.add_new())
             try:
-                return xmlutil.get_prop_path(inst, list_propname)[num]
+                return childlist[num]
             except IndexError:
                 if not can_edit:
                     return None
@@ -1447,13 +1790,19 @@ class VirtCLIParser(metaclass=_InitClass):
         Convert the passed optdict to a list of instantiated
         VirtCLIArguments to actually interact with
         """
+        found = []
+        for key in list(optdict.keys()):
+            rank, virtargstatic = self._lookup_virtarg(key)
+            if virtargstatic:
+                found.append((rank, virtargstatic, key))
+
+        # Process args in registration order, not command line order.
+        # sort() is stable, so keys for the same virtarg stay in order
+        found.sort(key=lambda f: f[0])
         ret = []
-        for virtargstatic in self._virtargs:
-            for key in list(optdict.keys()):
-                if virtargstatic.match_name(key):
-                    arginst = _VirtCLIArgument(virtargstatic,
-                                               key, optdict.pop(key))
-                    ret.append(arginst)
+        for _rank, virtargstatic, key in found:
+            arginst = _VirtCLIArgument(virtargstatic, key, optdict.pop(key))
+            ret.append(arginst)
         return ret
 
     def _check_leftover_opts(self, optdict):
@@ -1504,8 +1853,9 @@ class VirtCLIParser(metaclass=_InitClass):
 
         ret = []
         try:
-            objs = self._parse(inst is None and self.guest or inst)
-            for obj in xmlutil.listify(objs):
+            objs = self._parse(self.guest if inst is None else inst)
+            objs = xmlutil.listify(objs)
+            for obj in objs:
                 if not self.editing and hasattr(obj, "validate"):
                     obj.validate()
                 if not new_object:
@@ -1515,7 +1865,7 @@ class VirtCLIParser(metaclass=_InitClass):
                 else:
                     self.guest.add_child(obj)
 
-            ret += xmlutil.listify(objs)
+            ret += objs
         except Exception as e:
             log.debug("Exception parsing inst=%s optstr=%s",
                           inst, self.optstr, exc_info=True)
@@ -1534,18 +1884,28 @@ class VirtCLIParser(metaclass=_InitClass):
         """
         ret = []
         objlist = xmlutil.listify(self.lookup_prop(self.guest))
+        if self.optstr == "none" and not self._opttuples:
+            # __init__ skipped splitting, but here 'none' is a real
+            # lookup value, like --edit none
+            self._split_optstr()
 
+        inst = None
         try:
-            for inst in objlist:
+            # The param list doesn't depend on the inst, build it once
+            params = []
+            if objlist:
                 optdict = self.optdict.copy()
+                params = self._optdict_to_param_list(optdict)
+            for inst in objlist:
                 valid = True
-                for param in self._optdict_to_param_list(optdict):
+                for param in params:
                     paramret = param.lookup_param(self, inst)
                     if paramret is False:
                         valid = False
                         break
                 if valid:
                     ret.append(inst)
+            if objlist:
                 self._check_leftover_opts(optdict)
         except Exception as e:
             log.debug("Exception parsing inst=%s optstr=%s",
@@ -1559,6 +1919,17 @@ class VirtCLIParser(metaclass=_InitClass):
     def noset_cb(self, inst, val, virtarg):
         """Do nothing callback"""
 
+    def _maybe_skip_default(self):
+        """
+        For an option string of just 'none', set skip_default_propname
+        on the guest, so it doesn't add a default device of this type.
+        Returns True if the caller should stop parsing.
+        """
+        if self.optstr != "none" or not self.skip_default_propname:
+            return False
+        setattr(self.guest, self.skip_default_propname, True)
+        return True
+
 
 #################
 # --xml parsing #
@@ -1877,6 +2248,10 @@ def parse_os_variant(optstr):
 # --noautoconsole parsing #
 ###########################
 
+_GRAPHICAL_CONSOLE_TYPES = frozenset(["default",
+    DeviceGraphics.TYPE_VNC, DeviceGraphics.TYPE_SPICE])
+
+
 def _determine_default_autoconsole_type(guest, installer):
     """
     Determine the default console for the passed guest config
@@ -1892,20 +2267,21 @@ def _determine_default_autoconsole_type(guest, installer):
         return "text"
 
     gtype = gdevs[0].type
-    if gtype not in ["default",
-            DeviceGraphics.TYPE_VNC,
-            DeviceGraphics.TYPE_SPICE]:
+    if gtype not in _GRAPHICAL_CONSOLE_TYPES:
         log.debug("No viewer to launch for graphics type '%s'", gtype)
         return None
 
-    if not HAS_VIRTVIEWER and not xmlutil.in_testsuite():  # pragma: no cover
+    globalstate = get_global_state()
+    in_testsuite = globalstate.in_testsuite
+    if (not in_testsuite and
+        not globalstate.has_virtviewer()):  # pragma: no cover
         log.warning(_("Unable to connect to graphical console: "
                        "virt-viewer not installed. Please install "
                        "the 'virt-viewer' package."))
         return None
 
     if (not os.environ.get("DISPLAY", "") and
-        not xmlutil.in_testsuite()):  # pragma: no cover
+        not in_testsuite):  # pragma: no cover
         log.warning(_("Graphics requested but DISPLAY is not set. "
                        "Not running virt-viewer."))
         return None
@@ -2225,7 +2601,7 @@ class ParserCPU(VirtCLIParser):
         # enable 'foo' and 'bar' features, but that doesn't fit with the
         # CLI parser infrastructure very well.
         converted = collections.defaultdict(list)
-        for key, value in parse_optstr_tuples(self.optstr):
+        for key, value in self._opttuples:
             if key in ["force", "require", "optional", "disable", "forbid"]:
                 converted[key].append(value)
 
@@ -2285,18 +2661,17 @@ class ParserCPU(VirtCLIParser):
 
     def set_feature_cb(self, inst, val, virtarg):
         policy = virtarg.cliname
-        for feature_name in xmlutil.listify(val):
-            featureobj = None
-
-            for f in inst.features:
-                if f.name == feature_name:
-                    featureobj = f
-                    break
+        features = {}
+        for f in inst.features:
+            features.setdefault(f.name, f)
 
+        for feature_name in xmlutil.listify(val):
+            featureobj = features.get(feature_name)
             if featureobj:
                 featureobj.policy = policy
             else:
-                inst.add_feature(feature_name, policy)
+                features[feature_name] = inst.add_feature(
+                        feature_name, policy)
 
     @classmethod
     def _init_class(cls, **kwargs):
@@ -2571,15 +2946,11 @@ class ParserBoot(VirtCLIParser):
     }
 
     def _convert_boot_order(self, inst):
-        # Build boot order
-        boot_order = []
-        for cliname in list(self.optdict.keys()):
-            if cliname not in inst.BOOT_DEVICES:
-                continue
-
-            del(self.optdict[cliname])
-            if cliname not in boot_order:
-                boot_order.append(cliname)
+        # Build boot order. optdict keys are unique, so no need to dedup
+        boot_order = [cliname for cliname in self.optdict
+                      if cliname in inst.BOOT_DEVICES]
+        for cliname in boot_order:
+            del self.optdict[cliname]
 
         if boot_order:
             inst.bootorder = boot_order
@@ -2823,6 +3194,17 @@ class ParserFeatures(VirtCLIParser):
 class ParserClock(VirtCLIParser):
     cli_arg_name = "clock"
     guest_propname = "clock"
+    _timers_by_name = None
+
+    # Timer shortcut clinames for set_timer, split up front into
+    # (timer name, timer property). Ordered, since _init_class
+    # registers them in this order
+    _TIMER_ARGS = collections.OrderedDict(
+        (cliname, tuple(cliname.split("_"))) for cliname in [
+        "pit_tickpolicy", "rtc_tickpolicy",
+        "platform_present", "pit_present", "rtc_present", "hpet_present",
+        "tsc_present", "kvmclock_present", "hypervclock_present",
+    ])
 
     def _remove_old_options(self):
         # These _tickpolicy options have never had any effect in libvirt,
@@ -2841,6 +3223,8 @@ class ParserClock(VirtCLIParser):
 
     def _parse(self, inst):
         self._remove_old_options()
+        # name->timer map for set_timer, rebuilt per inst on first use
+        self._timers_by_name = None
         return super()._parse(inst)
 
 
@@ -2849,17 +3233,18 @@ class ParserClock(VirtCLIParser):
     ###################
 
     def set_timer(self, inst, val, virtarg):
-        tname, propname = virtarg.cliname.split("_")
+        tname, propname = self._TIMER_ARGS[virtarg.cliname]
 
-        timerobj = None
-        for t in inst.timers:
-            if t.name == tname:
-                timerobj = t
-                break
+        if self._timers_by_name is None:
+            self._timers_by_name = {}
+            for t in inst.timers:
+                self._timers_by_name.setdefault(t.name, t)
 
+        timerobj = self._timers_by_name.get(tname)
         if not timerobj:
             timerobj = inst.timers.add_new()
             timerobj.name = tname
+            self._timers_by_name[tname] = timerobj
 
         xmlutil.set_prop_path(timerobj, propname, val)
 
@@ -2876,24 +3261,10 @@ class ParserClock(VirtCLIParser):
         # Timer convenience helpers. It's unclear if we should continue
         # extending this pattern, or just push users to use finegrained
         # timer* config
-        cls.add_arg("pit_tickpolicy", None, lookup_cb=None,
-                    cb=cls.set_timer)
-        cls.add_arg("rtc_tickpolicy", None, lookup_cb=None,
-                    cb=cls.set_timer)
-        cls.add_arg("platform_present", None, lookup_cb=None, is_onoff=True,
-                    cb=cls.set_timer)
-        cls.add_arg("pit_present", None, lookup_cb=None, is_onoff=True,
-                    cb=cls.set_timer)
-        cls.add_arg("rtc_present", None, lookup_cb=None, is_onoff=True,
-                    cb=cls.set_timer)
-        cls.add_arg("hpet_present", None, lookup_cb=None, is_onoff=True,
-                    cb=cls.set_timer)
-        cls.add_arg("tsc_present", None, lookup_cb=None, is_onoff=True,
-                    cb=cls.set_timer)
-        cls.add_arg("kvmclock_present", None, lookup_cb=None, is_onoff=True,
-                    cb=cls.set_timer)
-        cls.add_arg("hypervclock_present", None, lookup_cb=None, is_onoff=True,
-                    cb=cls.set_timer)
+        for cliname, (_tname, propname) in cls._TIMER_ARGS.items():
+            cls.add_arg(cliname, None, lookup_cb=None,
+                        is_onoff=(propname == "present"),
+                        cb=cls.set_timer)
 
         # Standard XML options
         cls.add_arg("offset", "offset")
@@ -3077,7 +3448,13 @@ class ParserQemuCLI(VirtCLIParser):
     guest_propname = "xmlns_qemu"
 
     def args_cb(self, inst, val, virtarg):
-        for opt in shlex.split(val):
+        # Plain space separated args can skip shlex. Any other
+        # whitespace, like tabs or \xa0, needs shlex's splitting rules
+        if _needs_shlex(val) or re.search(r"[^\S ]", val):
+            opts = shlex.split(val)
+        else:
+            opts = [opt for opt in val.split(" ") if opt]
+        for opt in opts:
             obj = inst.args.add_new()
             obj.value = opt
 
@@ -3088,15 +3465,12 @@ class ParserQemuCLI(VirtCLIParser):
         obj.value = envval
 
     def _parse(self, inst):
-        self.optdict.clear()
-        if self.optstr.startswith("env="):
-            self.optdict["env"] = self.optstr.split("=", 1)[1]
-        elif self.optstr.startswith("args="):
-            self.optdict["args"] = self.optstr.split("=", 1)[1]
-        elif self.optstr.startswith("clearxml="):
-            self.optdict["clearxml"] = self.optstr.split("=", 1)[1]
+        # The value is passed through verbatim, so skip suboption parsing
+        key, sep, val = self.optstr.partition("=")
+        if sep and key in ("env", "args", "clearxml"):
+            self.optdict = {key: val}
         else:
-            self.optdict["args"] = self.optstr
+            self.optdict = {"args": self.optstr}
         return super()._parse(inst)
 
     @classmethod
@@ -3112,6 +3486,30 @@ class ParserQemuCLI(VirtCLIParser):
 # Guest <device> parsing #
 ##########################
 
+# (cliname, propname) pairs for the address.* options every device has
+_DEVICE_ADDRESS_ARGS = (
+    ("address.type", "address.type"),
+    ("address.domain", "address.domain"),
+    ("address.bus", "address.bus"),
+    ("address.slot", "address.slot"),
+    ("address.multifunction", "address.multifunction"),
+    ("address.function", "address.function"),
+    ("address.controller", "address.controller"),
+    ("address.unit", "address.unit"),
+    ("address.port", "address.port"),
+    ("address.target", "address.target"),
+    ("address.reg", "address.reg"),
+    ("address.cssid", "address.cssid"),
+    ("address.ssid", "address.ssid"),
+    ("address.devno", "address.devno"),
+    ("address.iobase", "address.iobase"),
+    ("address.irq", "address.irq"),
+    ("address.base", "address.base"),
+    ("address.zpci.uid", "address.zpci_uid"),
+    ("address.zpci.fid", "address.zpci_fid"),
+)
+
+
 def _add_common_device_args(cls,
         boot_order=False, boot_loadparm=False, virtio_options=False):
     """
@@ -3121,26 +3519,9 @@ def _add_common_device_args(cls,
         kwargs["skip_testsuite_tracking"] = True
         cls.add_arg(*args, **kwargs)
 
-    _add_arg("address.type", "address.type")
-    _add_arg("address.domain", "address.domain")
-    _add_arg("address.bus", "address.bus")
-    _add_arg("address.slot", "address.slot")
-    _add_arg("address.multifunction", "address.multifunction",
-                is_onoff=True)
-    _add_arg("address.function", "address.function")
-    _add_arg("address.controller", "address.controller")
-    _add_arg("address.unit", "address.unit")
-    _add_arg("address.port", "address.port")
-    _add_arg("address.target", "address.target")
-    _add_arg("address.reg", "address.reg")
-    _add_arg("address.cssid", "address.cssid")
-    _add_arg("address.ssid", "address.ssid")
-    _add_arg("address.devno", "address.devno")
-    _add_arg("address.iobase", "address.iobase")
-    _add_arg("address.irq", "address.irq")
-    _add_arg("address.base", "address.base")
-    _add_arg("address.zpci.uid", "address.zpci_uid")
-    _add_arg("address.zpci.fid", "address.zpci_fid")
+    for cliname, propname in _DEVICE_ADDRESS_ARGS:
+        _add_arg(cliname, propname,
+                 is_onoff=(cliname == "address.multifunction"))
 
     _add_arg("alias.name", "alias.name")
 
@@ -3241,11 +3622,36 @@ def _generate_new_volume_name(guest, poolobj, fmt):
         suffix=ext, collideguest=guest)
 
 
+def _parse_disk_size(val):
+    if val is None:
+        return None
+    try:
+        return float(val)
+    except Exception as e:
+        fail(_("Improper value for 'size': %s") % str(e))
+
+
+def _convert_disk_perms(optdict, val):
+    if val is None:
+        return
+    if val == "ro":
+        optdict["readonly"] = "on"
+    elif val == "sh":
+        optdict["shareable"] = "on"
+    elif val == "rw":
+        # It's default. Nothing to do.
+        pass
+    else:
+        fail(_("Unknown '%(optionname)s' value '%(string)s'") %
+            {"optionname": "perms", "string": val})
+
+
 class ParserDisk(VirtCLIParser):
     cli_arg_name = "disk"
     guest_propname = "devices.disk"
     remove_first = "path"
     stub_none = False
+    handles_none = True
     aliases = {
         "blockio.logical_block_size": "logical_block_size",
         "blockio.physical_block_size": "physical_block_size",
@@ -3303,36 +3709,14 @@ class ParserDisk(VirtCLIParser):
         if self.optstr == "none":
             return
 
-        def parse_size(val):
-            if val is None:
-                return None
-            try:
-                return float(val)
-            except Exception as e:
-                fail(_("Improper value for 'size': %s") % str(e))
-
-        def convert_perms(val):
-            if val is None:
-                return
-            if val == "ro":
-                self.optdict["readonly"] = "on"
-            elif val == "sh":
-                self.optdict["shareable"] = "on"
-            elif val == "rw":
-                # It's default. Nothing to do.
-                pass
-            else:
-                fail(_("Unknown '%(optionname)s' value '%(string)s'") %
-                    {"optionname": "perms", "string": val})
-
         backing_store = self.optdict.pop("backing_store", None)
         backing_format = self.optdict.pop("backing_format", None)
         poolname = self.optdict.pop("pool", None)
         volname = self.optdict.pop("vol", None)
-        size = parse_size(self.optdict.pop("size", None))
+        size = _parse_disk_size(self.optdict.pop("size", None))
         fmt = self.optdict.pop("format", None)
         sparse = _on_off_convert("sparse", self.optdict.pop("sparse", "yes"))
-        convert_perms(self.optdict.pop("perms", None))
+        _convert_disk_perms(self.optdict, self.optdict.pop("perms", None))
         disktype = self.optdict.pop("type", None)
 
         if volname:
@@ -3519,6 +3903,7 @@ class ParserNetwork(VirtCLIParser):
     guest_propname = "devices.interface"
     remove_first = "type"
     stub_none = False
+    handles_none = True
     aliases = {
         "driver.name": "driver_name",
         "driver.queues": "driver_queues",
@@ -3593,16 +3978,8 @@ class ParserNetwork(VirtCLIParser):
 
     def set_link_state(self, inst, val, virtarg):
         ignore = virtarg
-        if val in ["up", "down"]:
-            inst.link_state = val
-            return
-
-        ret = _raw_on_off_convert(val)
-        if ret is True:
-            val = "up"
-        elif ret is False:
-            val = "down"
-        inst.link_state = val
+        # up/down and anything unrecognized pass through unchanged
+        inst.link_state = _LINK_STATE_MAP.get((val or "").lower(), val)
 
     @classmethod
     def _init_class(cls, **kwargs):
@@ -3663,6 +4040,7 @@ class ParserGraphics(VirtCLIParser):
     guest_propname = "devices.graphics"
     remove_first = "type"
     stub_none = False
+    skip_default_propname = "skip_default_graphics"
     aliases = {
         "tlsPort": "tlsport",
         "password": "passwd",
@@ -3677,8 +4055,7 @@ class ParserGraphics(VirtCLIParser):
     }
 
     def _parse(self, inst):
-        if self.optstr == "none":
-            self.guest.skip_default_graphics = True
+        if self._maybe_skip_default():
             return
 
         return super()._parse(inst)
@@ -3896,13 +4273,13 @@ class ParserRedir(VirtCLIParser):
     guest_propname = "devices.redirdev"
     remove_first = "bus"
     stub_none = False
+    skip_default_propname = "skip_default_usbredir"
 
     def set_server_cb(self, inst, val, virtarg):
         inst.source.set_friendly_host(val)
 
     def _parse(self, inst):
-        if self.optstr == "none":
-            self.guest.skip_default_usbredir = True
+        if self._maybe_skip_default():
             return
         return super()._parse(inst)
 
@@ -3933,7 +4310,7 @@ class ParserTPM(VirtCLIParser):
     }
 
     def _parse(self, inst):
-        if (self.optdict.get("type", "").startswith("/")):
+        if (self.optdict.get("type") or "").startswith("/"):
             self.optdict["path"] = self.optdict.pop("type")
         return super()._parse(inst)
 
@@ -3960,6 +4337,7 @@ class ParserRNG(VirtCLIParser):
     guest_propname = "devices.rng"
     remove_first = "backend.model"
     stub_none = False
+    skip_default_propname = "skip_default_rng"
     aliases = {
         "backend.type": "backend_type",
         "backend.source.mode": "backend_mode",
@@ -3981,12 +4359,11 @@ class ParserRNG(VirtCLIParser):
             self.optdict["backend"] = self.optdict.pop("device")
 
     def _parse(self, inst):
-        if self.optstr == "none":
-            self.guest.skip_default_rng = True
+        if self._maybe_skip_default():
             return
 
         self._add_advertised_aliases()
-        if self.optdict.get("backend.model", "").startswith("/"):
+        if (self.optdict.get("backend.model") or "").startswith("/"):
             # Handle --rng /path/to/dev
             self.optdict["backend"] = self.optdict.pop("backend.model")
             self.optdict["backend.model"] = "random"
@@ -4114,7 +4491,7 @@ class ParserPanic(VirtCLIParser):
     def _parse(self, inst):
         # Handle old style '--panic 0xFOO' to set the iobase value
         if (len(self.optdict) == 1 and
-            self.optdict.get("model", "").startswith("0x")):
+            (self.optdict.get("model") or "").startswith("0x")):
             self.optdict["address.iobase"] = self.optdict["model"]
             self.optdict["model"] = DevicePanic.MODEL_ISA
 
@@ -4207,11 +4584,7 @@ class _ParserChar(VirtCLIParser):
             self.optdict["source.bind_host"] = self.optdict.pop("bind_host")
 
     def _parse(self, inst):
-        if self.optstr == "none" and inst.DEVICE_TYPE == "console":
-            self.guest.skip_default_console = True
-            return
-        if self.optstr == "none" and inst.DEVICE_TYPE == "channel":
-            self.guest.skip_default_channel = True
+        if self._maybe_skip_default():
             return
 
         self._add_advertised_aliases()
@@ -4234,11 +4607,6 @@ class _ParserChar(VirtCLIParser):
 
     @classmethod
     def _init_class(cls, **kwargs):
-        # _virtargs already populated via subclass creation, so
-        # don't double register options
-        if cls._virtargs:
-            return
-
         VirtCLIParser._init_class(**kwargs)
         _add_common_device_args(cls)
 
@@ -4273,11 +4641,13 @@ class ParserParallel(_ParserChar):
 class ParserChannel(_ParserChar):
     cli_arg_name = "channel"
     guest_propname = "devices.channel"
+    skip_default_propname = "skip_default_channel"
 
 
 class ParserConsole(_ParserChar):
     cli_arg_name = "console"
     guest_propname = "devices.console"
+    skip_default_propname = "skip_default_console"
 
 
 ########################
@@ -4375,10 +4745,10 @@ class ParserSound(VirtCLIParser):
     guest_propname = "devices.sound"
     remove_first = "model"
     stub_none = False
+    skip_default_propname = "skip_default_sound"
 
     def _parse(self, inst):
-        if self.optstr == "none":
-            self.guest.skip_default_sound = True
+        if self._maybe_skip_default():
             return
         return super()._parse(inst)
 
@@ -4485,20 +4855,22 @@ def parse_option_strings(options, guest, instlist, editing=False):
         if not optlist:
             continue
 
-        for inst in instlist:
-            if inst and optlist:
-                # If an object is passed in, we are updating it in place, and
-                # only use the last command line occurrence, eg. from virt-xml
-                optlist = [optlist[-1]]
+        # If an object is passed in, we are updating it in place, and
+        # only use the last command line occurrence, eg. from virt-xml
+        lastopt = optlist[-1:]
 
-            for optstr in optlist:
+        for inst in instlist:
+            for optstr in (lastopt if inst else optlist):
                 parserobj = parserclass(optstr, guest=guest, editing=editing)
                 parseret = parserobj.parse(inst)
-                ret += xmlutil.listify(parseret)
+                ret.extend(xmlutil.listify(parseret))
 
     return ret
 
 
+_INTROSPECTION_OPTSTRS = frozenset(["?", "help"])
+
+
 def check_option_introspection(options):
     """
     Check if the user requested option introspection with ex: '--disk=?'
@@ -4512,8 +4884,10 @@ def check_option_introspection(options):
             continue
 
         for optstr in optlist:
-            if optstr == "?" or optstr == "help":
+            if optstr in _INTROSPECTION_OPTSTRS:
                 parserclass.print_introspection()
                 ret = True
+                # Print it once, even for ex. '--disk ? --disk help'
+                break
 
     return ret
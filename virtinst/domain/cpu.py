@@ -108,10 +108,11 @@ class DomainCpu(XMLBuilder):
     SPECIAL_MODE_HOST_PASSTHROUGH = "host-passthrough"
     SPECIAL_MODE_CLEAR = "clear"
     SPECIAL_MODE_APP_DEFAULT = "default"
-    SPECIAL_MODES = [SPECIAL_MODE_HOST_MODEL_ONLY, SPECIAL_MODE_HV_DEFAULT,
+    SPECIAL_MODES = frozenset([SPECIAL_MODE_HOST_MODEL_ONLY,
+                     SPECIAL_MODE_HV_DEFAULT,
                      SPECIAL_MODE_HOST_COPY, SPECIAL_MODE_HOST_MODEL,
                      SPECIAL_MODE_HOST_PASSTHROUGH, SPECIAL_MODE_CLEAR,
-                     SPECIAL_MODE_APP_DEFAULT]
+                     SPECIAL_MODE_APP_DEFAULT])
     def set_special_mode(self, guest, val):
         if val == self.SPECIAL_MODE_APP_DEFAULT:
             # If libvirt is new enough to support reliable mode=host-model
@@ -198,6 +199,7 @@ class DomainCpu(XMLBuilder):
         feature = self.features.add_new()
         feature.name = name
         feature.policy = policy
+        return feature
     features = XMLChildProperty(_CPUFeature)
 
     cells = XMLChildProperty(_CPUCell, relative_xpath="./numa")
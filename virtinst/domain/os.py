@@ -33,8 +33,8 @@ class DomainOs(XMLBuilder):
     BOOT_DEVICE_CDROM = "cdrom"
     BOOT_DEVICE_FLOPPY = "fd"
     BOOT_DEVICE_NETWORK = "network"
-    BOOT_DEVICES = [BOOT_DEVICE_HARDDISK, BOOT_DEVICE_CDROM,
-                    BOOT_DEVICE_FLOPPY, BOOT_DEVICE_NETWORK]
+    BOOT_DEVICES = frozenset([BOOT_DEVICE_HARDDISK, BOOT_DEVICE_CDROM,
+                    BOOT_DEVICE_FLOPPY, BOOT_DEVICE_NETWORK])
 
     def is_hvm(self):
         return self.os_type == "hvm"
@@ -12,10 +12,14 @@ log = logging.getLogger("virtinst")
 def reset_logging():
     rootLogger = logging.getLogger()
 
-    # Undo early logging
-    for handler in rootLogger.handlers:
+    # Undo early logging. Iterate over a copy, since removeHandler
+    # mutates the list we are walking
+    for handler in rootLogger.handlers[:]:
         rootLogger.removeHandler(handler)
 
-    # Undo any logging on our log handler. Needed for test suite
-    for handler in log.handlers:
+    # Undo any logging on our log handler. Needed for test suite.
+    # These are handlers we created, so close them too. That also
+    # writes out and closes the cli tools' queued logfile
+    for handler in log.handlers[:]:
         log.removeHandler(handler)
+        handler.close()
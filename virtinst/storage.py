@@ -468,7 +468,7 @@ class StorageVolume(_StorageObject):
         :param collideguest: Guest object. If specified, also check to
         ensure we don't collide with any disk paths there
         """
-        collidelist = []
+        collidelist = set()
         if collideguest:
             pooltarget = None
             poolname = pool_object.name()
@@ -481,7 +481,7 @@ class StorageVolume(_StorageObject):
                 checkpath = disk.get_source_path()
                 if (pooltarget and checkpath and
                     os.path.dirname(checkpath) == pooltarget):
-                    collidelist.append(os.path.basename(checkpath))
+                    collidelist.add(os.path.basename(checkpath))
 
         def cb(tryname):
             if tryname in collidelist:
@@ -713,10 +713,12 @@ def _connect_console(guest, instdomain, autoconsole, wait):
         return
 
     # If we connected the console, wait for it to finish
-    try:
-        errcode = os.waitpid(child, 0)[1]
-    except OSError as e:  # pragma: no cover
-        log.debug("waitpid error: %s", e)
+    errcode = 1
+    if child:
+        try:
+            errcode = os.waitpid(child, 0)[1]
+        except OSError as e:  # pragma: no cover
+            log.debug("waitpid error: %s", e)
 
     if errcode:
         log.warning(_("Console command returned failure."))